@@ -2,14 +2,28 @@
 Flask application for Health Tracker
 """
 import os
-from datetime import datetime
-
-from flask import Flask, flash, jsonify, redirect, render_template, request, session, url_for
+import sqlite3
+from datetime import datetime, time, timedelta, timezone
+from functools import wraps
+
+import msgspec
+import redis
+from flask import Flask, flash, g, jsonify, redirect, render_template, request, session, url_for
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase
-from werkzeug.security import check_password_hash, generate_password_hash
+from jinja2 import FileSystemBytecodeCache
+from pydantic import ValidationError
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+from sqlalchemy import event, insert, literal, select, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import DeclarativeBase, defer, load_only
 from werkzeug.middleware.proxy_fix import ProxyFix
 
+from json_provider import OrjsonProvider
+from schemas import HOT_SCHEMAS, HealthDataCreateFast, activity_bulk_adapter, nutrition_bulk_adapter
+
 
 class Base(DeclarativeBase):
     pass
@@ -19,22 +33,91 @@ db = SQLAlchemy(model_class=Base)
 # create the app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "health_tracker_secret_key")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)  # needed for url_for to generate with https
+app.json = OrjsonProvider(app)
+# x_proto/x_host are needed for url_for to generate with https. X-Forwarded-For is only trusted
+# behind a configured number of proxies, as rate limits are keyed on the client IP it yields.
+trusted_proxies = int(os.environ.get("TRUSTED_PROXIES", 0))
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=1, x_host=1)
+
+# Cache compiled templates on disk so restarted workers load them instead of recompiling;
+# templates are only re-checked for changes in debug mode
+jinja_cache_dir = os.environ.get("JINJA_CACHE_DIR")
+if jinja_cache_dir:
+    os.makedirs(jinja_cache_dir, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir)
+
+# Rate limiting; counters are shared across workers through Redis when it is configured. If Redis
+# is unreachable, limits fall back to per-process memory rather than failing the request.
+limiter = Limiter(
+    get_remote_address,
+    storage_uri=os.environ.get("REDIS_URL", "memory://"),
+    swallow_errors=True,
+    in_memory_fallback_enabled=True
+)
 
 # configure the database
 # Use SQLite for development/testing
 sqlite_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'health_tracker.db')
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{sqlite_path}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-# initialize the app with the extension
-db.init_app(app)
 
-# Import models after db is defined
-from models import ActivityEntry, Goal, HealthData, Insight, NutritionEntry, User  # noqa: E402
 
-# Create all tables
-with app.app_context():
-    db.create_all()
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection for a single-writer web app"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers run alongside the writer; with synchronous=NORMAL a commit no longer fsyncs
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA cache_size=-64000")  # 64 MB
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+# Import models after db is defined
+from models import Achievement, ActivityEntry, Goal, HealthData, Insight, NutritionEntry, User  # noqa: E402
+from cache import get_achievements, get_cached_insight, get_user, invalidate_achievements, invalidate_user  # noqa: E402
+from services.gamification_service import (  # noqa: E402
+    check_achievements,
+    create_default_achievements,
+    get_new_achievement_notifications,
+    update_user_streak
+)
+
+
+def login_required(message=None):
+    """Require a logged-in user for a view
+
+    Pages pass the message to flash before redirecting to the login page; AJAX endpoints
+    (no message, or an XMLHttpRequest) get a JSON error instead.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped_view(*args, **kwargs):
+            if g.user is None:
+                if message is None or request.headers.get("X-Requested-With") == "XMLHttpRequest":
+                    return jsonify({"success": False, "error": "Not logged in"})
+                flash(message, "warning")
+                return redirect(url_for("login"))
+            return view(*args, **kwargs)
+
+        wrapped_view.login_required = True
+        return wrapped_view
+
+    return decorator
+
+
+@app.before_request
+def load_logged_in_user():
+    """Load the session user into g.user once per request for views that need it"""
+    g.user = None
+    view = app.view_functions.get(request.endpoint)
+    if "user_id" in session and getattr(view, "login_required", False):
+        g.user = get_user(session["user_id"])
 
 
 @app.route("/")
@@ -44,6 +127,7 @@ def home():
 
 
 @app.route("/login", methods=["GET", "POST"])
+@limiter.limit("10 per minute", methods=["POST"])
 def login():
     """Login page route"""
     if request.method == "POST":
@@ -54,8 +138,10 @@ def login():
             flash("Please provide both username and password", "danger")
             return render_template("login.html")
 
-        user = User.query.filter_by(username=username).first()
+        user = db.session.execute(select(User).where(User.username == username)).scalar()
         if user and user.check_password(password):
+            # Persist the upgraded hash if check_password rehashed the password
+            db.session.commit()
             session["user_id"] = user.id
             session["username"] = user.username
             flash("Login successful!", "success")
@@ -85,12 +171,12 @@ def register():
             return render_template("register.html")
 
         # Check if username or email already exists
-        existing_user = User.query.filter_by(username=username).first()
+        existing_user = db.session.execute(select(User.id).where(User.username == username)).scalar()
         if existing_user:
             flash("Username already exists", "danger")
             return render_template("register.html")
 
-        existing_email = User.query.filter_by(email=email).first()
+        existing_email = db.session.execute(select(User.id).where(User.email == email)).scalar()
         if existing_email:
             flash("Email already registered", "danger")
             return render_template("register.html")
@@ -124,23 +210,32 @@ def logout():
 
 
 @app.route("/dashboard")
+@login_required("Please log in to access your dashboard")
 def dashboard():
     """Dashboard page route"""
-    if "user_id" not in session:
-        flash("Please log in to access your dashboard", "warning")
-        return redirect(url_for("login"))
-
-    user_id = session["user_id"]
-    user = User.query.get(user_id)
-
-    # Get the latest health data
-    latest_health_data = HealthData.query.filter_by(user_id=user_id).order_by(HealthData.date.desc()).first()
+    user = g.user
+    user_id = user.id
+
+    # Get the latest health data, only the columns the dashboard shows
+    latest_health_data = db.session.execute(
+        select(HealthData)
+        .options(load_only(
+            HealthData.date, HealthData.weight, HealthData.steps, HealthData.sleep_hours, HealthData.water_intake
+        ))
+        .where(HealthData.user_id == user_id)
+        .order_by(HealthData.date.desc())
+        .limit(1)
+    ).scalar()
 
     # Get active goals
-    active_goals = Goal.query.filter_by(user_id=user_id, is_achieved=False).all()
+    active_goals = db.session.execute(
+        select(Goal).where(Goal.user_id == user_id, Goal.is_achieved == False)  # noqa: E712
+    ).scalars().all()
 
     # Get recent insights
-    recent_insights = Insight.query.filter_by(user_id=user_id).order_by(Insight.created_at.desc()).limit(3).all()
+    recent_insights = db.session.execute(
+        select(Insight).where(Insight.user_id == user_id).order_by(Insight.created_at.desc()).limit(3)
+    ).scalars().all()
 
     return render_template(
         "dashboard.html",
@@ -151,14 +246,16 @@ def dashboard():
     )
 
 
+# Number of history entries shown per page on the health data page
+HEALTH_HISTORY_PAGE_SIZE = 50
+HEALTH_HISTORY_MAX_PAGE_SIZE = 200
+
+
 @app.route("/health-data", methods=["GET", "POST"])
+@login_required("Please log in to access your health data")
 def health_data():
     """Health data page route"""
-    if "user_id" not in session:
-        flash("Please log in to access your health data", "warning")
-        return redirect(url_for("login"))
-
-    user_id = session["user_id"]
+    user_id = g.user.id
 
     if request.method == "POST":
         # Get form data
@@ -175,7 +272,7 @@ def health_data():
         notes = request.form.get("notes")
 
         # Create new health data entry
-        health_data_entry = HealthData(
+        _, new_achievements = _record_health_data(HealthData(
             user_id=user_id,
             date=datetime.utcnow(),
             weight=weight,
@@ -189,16 +286,8 @@ def health_data():
             blood_pressure_systolic=blood_pressure_systolic,
             blood_pressure_diastolic=blood_pressure_diastolic,
             notes=notes
-        )
+        ))
 
-        db.session.add(health_data_entry)
-        db.session.commit()
-        
-        # Update streak and check for new achievements
-        from services.gamification_service import update_user_streak, check_achievements
-        update_user_streak(user_id)
-        new_achievements = check_achievements(user_id)
-        
         if new_achievements:
             achievement_names = [a['name'] for a in new_achievements]
             flash(f"Health data recorded successfully! You've earned {len(new_achievements)} new achievement(s): {', '.join(achievement_names)}", "success")
@@ -207,36 +296,121 @@ def health_data():
             
         return redirect(url_for("health_data"))
 
-    # Get health data history
-    health_history = HealthData.query.filter_by(user_id=user_id).order_by(HealthData.date.desc()).all()
+    # Get one page of health data history, newest first, keyed on the ?before= (date, id) cursor
+    limit = request.args.get("limit", HEALTH_HISTORY_PAGE_SIZE, type=int)
+    limit = min(max(limit, 1), HEALTH_HISTORY_MAX_PAGE_SIZE)
+    before = request.args.get("before", type=_parse_history_cursor)
+
+    # Notes are free text of any length, so they are only loaded if the template reads them
+    history_query = select(HealthData).options(defer(HealthData.notes)).where(HealthData.user_id == user_id)
+    if before:
+        # Entries can share a date (every sync for a day is stored at midnight), so the id breaks ties
+        history_query = history_query.where(tuple_(HealthData.date, HealthData.id) < before)
+    # Fetch one extra row to find out whether there is another page
+    health_history = db.session.execute(
+        history_query.order_by(HealthData.date.desc(), HealthData.id.desc()).limit(limit + 1)
+    ).scalars().all()
+
+    next_before = None
+    if len(health_history) > limit:
+        health_history = health_history[:limit]
+        last = health_history[-1]
+        next_before = f"{last.date.isoformat()},{last.id}"
+
+    return render_template("health_data.html", health_history=health_history, next_before=next_before)
+
+
+def _parse_history_cursor(value):
+    """Parse a "<date>,<id>" health history cursor into a (datetime, int) tuple"""
+    date, _, health_data_id = value.rpartition(",")
+    return datetime.fromisoformat(date), int(health_data_id)
+
+
+def _record_health_data(health_data_entry):
+    """Save a new health data entry, then update the user's streak and achievements
+
+    Returns the entry's id and the newly earned achievements.
+    """
+    user_id = health_data_entry.user_id
+    db.session.add(health_data_entry)
+    db.session.flush()
+    health_data_id = health_data_entry.id
+    db.session.commit()
+
+    update_user_streak(user_id)
+    new_achievements = check_achievements(user_id)
+    invalidate_user(user_id)
+    if new_achievements:
+        invalidate_achievements(user_id)
+
+    return health_data_id, new_achievements
+
+
+@app.route("/sync-health-data", methods=["POST"])
+@login_required()
+def sync_health_data():
+    """Record health data sent as JSON, e.g. by a phone sync"""
+    try:
+        data = msgspec.json.decode(request.get_data(), type=HealthDataCreateFast)
+    except msgspec.DecodeError as e:
+        return jsonify({"success": False, "error": str(e)})
+
+    values = msgspec.structs.asdict(data)
+    # Stripped here as the pydantic health data schemas do
+    if values["notes"] is not None:
+        values["notes"] = values["notes"].strip()
+    # A synced day is recorded at its midnight; without one the entry is for now
+    date = values.pop("date")
+    health_data_id, new_achievements = _record_health_data(HealthData(
+        user_id=g.user.id,
+        date=datetime.combine(date, time.min) if date else datetime.utcnow(),
+        **values
+    ))
+
+    return jsonify({
+        "success": True,
+        "health_data_id": health_data_id,
+        "new_achievements": new_achievements
+    })
+
+
+def _get_or_create_today_health_data_id(user_id):
+    """Get or create the user's health data entry for today and return its id"""
+    # Compare against a [start, end) range rather than DATE(date) so the (user_id, date) index is used
+    today_start = datetime.combine(datetime.utcnow().date(), time.min)
+    today_end = today_start + timedelta(days=1)
+    today_entry = select(HealthData.id).where(
+        HealthData.user_id == user_id,
+        HealthData.date >= today_start,
+        HealthData.date < today_end
+    ).limit(1)
 
-    return render_template("health_data.html", health_history=health_history)
+    health_data_id = db.session.execute(today_entry).scalar()
+    if health_data_id is None:
+        # INSERT ... SELECT ... WHERE NOT EXISTS checks and inserts in one statement, so concurrent
+        # requests can't both create a row. It is committed together with the caller's entry.
+        create_entry = insert(HealthData).from_select(
+            ["user_id", "date"],
+            select(literal(user_id), literal(datetime.utcnow())).where(~today_entry.exists())
+        ).returning(HealthData.id)
+        health_data_id = db.session.execute(create_entry).scalar()
+
+        if health_data_id is None:
+            # Another request created today's entry first
+            health_data_id = db.session.execute(today_entry).scalar()
+
+    return health_data_id
 
 
 @app.route("/add-nutrition", methods=["POST"])
+@login_required()
 def add_nutrition_entry():
     """Add a nutrition entry"""
-    if "user_id" not in session:
-        return jsonify({"success": False, "error": "Not logged in"})
-
-    user_id = session["user_id"]
+    user_id = g.user.id
     health_data_id = request.form.get("health_data_id", type=int)
     
     if not health_data_id:
-        # Get or create a health data entry for today
-        today = datetime.utcnow().date()
-        health_data = HealthData.query.filter_by(
-            user_id=user_id
-        ).filter(
-            db.func.date(HealthData.date) == today
-        ).first()
-        
-        if not health_data:
-            health_data = HealthData(user_id=user_id, date=datetime.utcnow())
-            db.session.add(health_data)
-            db.session.commit()
-        
-        health_data_id = health_data.id
+        health_data_id = _get_or_create_today_health_data_id(user_id)
 
     # Create nutrition entry
     nutrition_entry = NutritionEntry(
@@ -261,29 +435,14 @@ def add_nutrition_entry():
 
 
 @app.route("/add-activity", methods=["POST"])
+@login_required()
 def add_activity_entry():
     """Add an activity entry"""
-    if "user_id" not in session:
-        return jsonify({"success": False, "error": "Not logged in"})
-
-    user_id = session["user_id"]
+    user_id = g.user.id
     health_data_id = request.form.get("health_data_id", type=int)
     
     if not health_data_id:
-        # Get or create a health data entry for today
-        today = datetime.utcnow().date()
-        health_data = HealthData.query.filter_by(
-            user_id=user_id
-        ).filter(
-            db.func.date(HealthData.date) == today
-        ).first()
-        
-        if not health_data:
-            health_data = HealthData(user_id=user_id, date=datetime.utcnow())
-            db.session.add(health_data)
-            db.session.commit()
-        
-        health_data_id = health_data.id
+        health_data_id = _get_or_create_today_health_data_id(user_id)
 
     # Create activity entry
     activity_entry = ActivityEntry(
@@ -304,56 +463,128 @@ def add_activity_entry():
     })
 
 
+def _add_entries_bulk(model, adapter):
+    """Insert a JSON list of entries for the logged-in user in a single transaction"""
+    user_id = g.user.id
+
+    try:
+        entries = adapter.validate_json(request.get_data())
+    except ValidationError as e:
+        return jsonify({
+            "success": False,
+            "error": "Expected a non-empty JSON list of valid entries",
+            "details": e.errors(include_url=False, include_context=False, include_input=False)
+        })
+
+    # Entries may only be added to the user's own health data, checked for the whole batch at once
+    health_data_ids = {entry.health_data_id for entry in entries if entry.health_data_id}
+    if health_data_ids:
+        owned_ids = set(db.session.execute(
+            select(HealthData.id).where(HealthData.id.in_(health_data_ids), HealthData.user_id == user_id)
+        ).scalars())
+        if owned_ids != health_data_ids:
+            return jsonify({"success": False, "error": "Health data entry not found"})
+
+    # Entries without a health_data_id go to today's entry, looked up once for the whole batch
+    today_health_data_id = None
+    now = datetime.utcnow()
+    rows = [entry.model_dump() for entry in entries]
+    for row in rows:
+        if not row["health_data_id"]:
+            if today_health_data_id is None:
+                today_health_data_id = _get_or_create_today_health_data_id(user_id)
+            row["health_data_id"] = today_health_data_id
+        # Entries logged without a time are recorded at the time of the request; times are stored as naive UTC
+        if row["time"] is None:
+            row["time"] = now
+        elif row["time"].tzinfo is not None:
+            row["time"] = row["time"].astimezone(timezone.utc).replace(tzinfo=None)
+
+    entry_ids = db.session.execute(
+        insert(model).returning(model.id, sort_by_parameter_order=True),
+        rows
+    ).scalars().all()
+    db.session.commit()
+
+    return jsonify({
+        "success": True,
+        "message": f"{len(entry_ids)} entry(s) added",
+        "entry_ids": entry_ids
+    })
+
+
+@app.route("/add-nutrition-bulk", methods=["POST"])
+@login_required()
+def add_nutrition_entries_bulk():
+    """Add several nutrition entries, e.g. every item of a meal, from a JSON list"""
+    return _add_entries_bulk(NutritionEntry, nutrition_bulk_adapter)
+
+
+@app.route("/add-activity-bulk", methods=["POST"])
+@login_required()
+def add_activity_entries_bulk():
+    """Add several activity entries from a JSON list"""
+    return _add_entries_bulk(ActivityEntry, activity_bulk_adapter)
+
+
 @app.route("/insights")
+@login_required("Please log in to access your insights")
 def insights():
     """Insights page route"""
-    if "user_id" not in session:
-        flash("Please log in to access your insights", "warning")
-        return redirect(url_for("login"))
-
-    user_id = session["user_id"]
+    user_id = g.user.id
     
     # Get user's health data
-    health_data = HealthData.query.filter_by(user_id=user_id).order_by(HealthData.date.desc()).first()
+    health_data = db.session.execute(
+        select(HealthData).where(HealthData.user_id == user_id).order_by(HealthData.date.desc()).limit(1)
+    ).scalar()
     
     # Get insights
-    insights = Insight.query.filter_by(user_id=user_id).order_by(Insight.created_at.desc()).all()
+    insights = db.session.execute(
+        select(Insight).where(Insight.user_id == user_id).order_by(Insight.created_at.desc())
+    ).scalars().all()
 
     return render_template("insights.html", health_data=health_data, insights=insights)
 
 
 @app.route("/generate-insight", methods=["POST"])
+@login_required()
 def generate_insight():
     """Generate a new AI insight"""
-    if "user_id" not in session:
-        return jsonify({"success": False, "error": "Not logged in"})
-
-    user_id = session["user_id"]
+    user_id = g.user.id
     
     # Get the user's recent health data
-    health_data = HealthData.query.filter_by(user_id=user_id).order_by(HealthData.date.desc()).first()
+    health_data_id = db.session.execute(
+        select(HealthData.id).where(HealthData.user_id == user_id).order_by(HealthData.date.desc()).limit(1)
+    ).scalar()
     
-    if not health_data:
+    if health_data_id is None:
         return jsonify({"success": False, "error": "No health data available for insights"})
     
-    # Import Groq service
-    from services.groq_service import generate_health_insight
-    
+    # Reuse the insight already generated for this entry
+    insight_text = get_cached_insight(user_id, health_data_id)
+    if insight_text is not None:
+        return jsonify({
+            "success": True,
+            "insight": insight_text
+        })
+
+    # Imported here rather than at the top, as RQ workers import tasks first and tasks imports this module
+    from tasks import create_insight, generate_insight_job, insight_queue
+
+    if insight_queue is not None:
+        # Generate in the background; the client polls /insight-status/<task_id>
+        try:
+            job = insight_queue.enqueue(generate_insight_job, user_id, health_data_id)
+            return jsonify({
+                "success": True,
+                "task_id": job.id
+            })
+        except redis.RedisError:
+            app.logger.warning("Could not enqueue insight for user %s, generating it now", user_id, exc_info=True)
+
     try:
         # Generate insight using Groq
-        insight_text = generate_health_insight(health_data)
-        
-        # Save the insight to the database
-        new_insight = Insight(
-            user_id=user_id,
-            insight_text=insight_text,
-            category="health",
-            created_at=datetime.utcnow(),
-            is_read=False
-        )
-        
-        db.session.add(new_insight)
-        db.session.commit()
+        insight_text = create_insight(user_id, health_data_id)
         
         return jsonify({
             "success": True,
@@ -366,14 +597,51 @@ def generate_insight():
         })
 
 
+@app.route("/insight-status/<task_id>")
+@login_required()
+def insight_status(task_id):
+    """Report the progress of a background insight generation"""
+    from tasks import insight_queue
+
+    job = None
+    if insight_queue is not None:
+        try:
+            job = Job.fetch(task_id, connection=insight_queue.connection)
+            status = job.get_status()
+            insight_text = job.return_value() if status == "finished" else None
+        except NoSuchJobError:
+            job = None
+        except redis.RedisError:
+            app.logger.warning("Could not fetch insight task %s", task_id, exc_info=True)
+            job = None
+
+    if job is None or job.args[0] != g.user.id:
+        return jsonify({"success": False, "error": "Task not found"})
+
+    if status == "finished":
+        return jsonify({
+            "success": True,
+            "status": status,
+            "insight": insight_text
+        })
+    if status == "failed":
+        return jsonify({
+            "success": False,
+            "status": status,
+            "error": "Insight generation failed"
+        })
+
+    return jsonify({
+        "success": True,
+        "status": status
+    })
+
+
 @app.route("/goals", methods=["GET", "POST"])
+@login_required("Please log in to access your goals")
 def goals():
     """Goals page route"""
-    if "user_id" not in session:
-        flash("Please log in to access your goals", "warning")
-        return redirect(url_for("login"))
-
-    user_id = session["user_id"]
+    user_id = g.user.id
     
     if request.method == "POST":
         # Create a new goal
@@ -398,8 +666,12 @@ def goals():
         return redirect(url_for("goals"))
     
     # Get active and completed goals
-    active_goals = Goal.query.filter_by(user_id=user_id, is_achieved=False).all()
-    completed_goals = Goal.query.filter_by(user_id=user_id, is_achieved=True).all()
+    active_goals = db.session.execute(
+        select(Goal).where(Goal.user_id == user_id, Goal.is_achieved == False)  # noqa: E712
+    ).scalars().all()
+    completed_goals = db.session.execute(
+        select(Goal).where(Goal.user_id == user_id, Goal.is_achieved == True)  # noqa: E712
+    ).scalars().all()
     
     return render_template(
         "goals.html",
@@ -409,18 +681,13 @@ def goals():
 
 
 @app.route("/update-goal/<int:goal_id>", methods=["POST"])
+@login_required("Please log in to update goals")
 def update_goal(goal_id):
     """Update a goal"""
-    if "user_id" not in session:
-        if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-            return jsonify({"success": False, "error": "Not logged in"})
-        flash("Please log in to update goals", "warning")
-        return redirect(url_for("login"))
-
-    user_id = session["user_id"]
-    goal = Goal.query.filter_by(id=goal_id, user_id=user_id).first()
+    user_id = g.user.id
+    goal = db.session.get(Goal, goal_id)
     
-    if not goal:
+    if not goal or goal.user_id != user_id:
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
             return jsonify({"success": False, "error": "Goal not found"})
         flash("Goal not found", "danger")
@@ -443,16 +710,13 @@ def update_goal(goal_id):
 
 
 @app.route("/delete-goal/<int:goal_id>", methods=["POST"])
+@login_required("Please log in to delete goals")
 def delete_goal(goal_id):
     """Delete a goal"""
-    if "user_id" not in session:
-        flash("Please log in to delete goals", "warning")
-        return redirect(url_for("login"))
-
-    user_id = session["user_id"]
-    goal = Goal.query.filter_by(id=goal_id, user_id=user_id).first()
+    user_id = g.user.id
+    goal = db.session.get(Goal, goal_id)
     
-    if not goal:
+    if not goal or goal.user_id != user_id:
         flash("Goal not found", "danger")
     else:
         db.session.delete(goal)
@@ -462,40 +726,27 @@ def delete_goal(goal_id):
     return redirect(url_for("goals"))
 
 
+def _group_by_category(achievements):
+    """Group achievement dicts into a category-keyed mapping, keeping the service's order"""
+    by_category = {}
+    for achievement in achievements:
+        by_category.setdefault(achievement["category"], []).append(achievement)
+    return by_category
+
+
 @app.route("/achievements")
+@login_required("Please log in to view your achievements")
 def achievements():
     """Achievements and streaks page"""
-    if "user_id" not in session:
-        flash("Please log in to view your achievements", "warning")
-        return redirect(url_for("login"))
-    
-    user_id = session["user_id"]
-    user = User.query.get(user_id)
-    
-    # Import achievements service
-    from services.gamification_service import get_user_achievements, get_unearned_achievements, create_default_achievements
-    
-    # Make sure default achievements exist
-    create_default_achievements()
+    user = g.user
+    user_id = user.id
     
     # Get user's earned and unearned achievements
-    earned_achievements = get_user_achievements(user_id)
-    unearned_achievements = get_unearned_achievements(user_id)
+    earned_achievements, unearned_achievements = get_achievements(user_id)
     
     # Group achievements by category
-    earned_by_category = {}
-    for achievement in earned_achievements:
-        category = achievement["category"]
-        if category not in earned_by_category:
-            earned_by_category[category] = []
-        earned_by_category[category].append(achievement)
-    
-    unearned_by_category = {}
-    for achievement in unearned_achievements:
-        category = achievement["category"]
-        if category not in unearned_by_category:
-            unearned_by_category[category] = []
-        unearned_by_category[category].append(achievement)
+    earned_by_category = _group_by_category(earned_achievements)
+    unearned_by_category = _group_by_category(unearned_achievements)
     
     return render_template(
         "achievements.html",
@@ -508,21 +759,19 @@ def achievements():
 
 
 @app.route("/update-streak", methods=["POST"])
+@login_required()
 def update_streak():
     """Update user streak and check for achievements"""
-    if "user_id" not in session:
-        return jsonify({"success": False, "error": "Not logged in"})
-    
-    user_id = session["user_id"]
-    
-    # Import streak and achievements services
-    from services.gamification_service import update_user_streak, check_achievements, get_new_achievement_notifications
+    user_id = g.user.id
     
     # Update streak
     streak_info = update_user_streak(user_id)
     
     # Check for new achievements
     new_achievements = check_achievements(user_id)
+    invalidate_user(user_id)
+    if new_achievements:
+        invalidate_achievements(user_id)
     
     # Get achievement notifications
     notifications = get_new_achievement_notifications(user_id)
@@ -535,13 +784,54 @@ def update_streak():
     })
 
 
-# Register blueprints for meal planning, notifications, and chatbot
-from routers.meal_planning_router import meal_planning
-from routers.chatbot_router import chatbot
+def _init_database():
+    """Create missing tables and indexes and seed the default achievements"""
+    db.create_all()
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            # Primary keys are indexed by SQLite itself; drop the duplicate id indexes older schemas declared
+            connection.execute(text(f"DROP INDEX IF EXISTS ix_{table.name}_id"))
+            # create_all() skips tables that already exist, so add indexes declared after the table was created
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+    # Seed the default achievements once at startup instead of on every achievements page load
+    if db.session.execute(select(Achievement.id).limit(1)).scalar() is None:
+        create_default_achievements()
+
+
+def create_app():
+    """Initialize the application and return it
+
+    Gunicorn calls this once in the master (preload_app), so the schemas, models and
+    blueprints are built before forking and shared by the workers. Calling it again
+    returns the already initialized app.
+    """
+    if "sqlalchemy" in app.extensions:
+        return app
+
+    db.init_app(app)
+    limiter.init_app(app)
+
+    # Other schemas are built the first time they validate something
+    for schema in HOT_SCHEMAS:
+        schema.model_rebuild()
+
+    with app.app_context():
+        _init_database()
+        # Close the startup connections so forked workers don't share SQLite handles
+        db.session.remove()
+        db.engine.dispose()
+
+    # Register blueprints for meal planning, notifications, and chatbot
+    from routers.meal_planning_router import meal_planning
+    from routers.chatbot_router import chatbot
+
+    app.register_blueprint(meal_planning)
+    app.register_blueprint(chatbot)
 
-app.register_blueprint(meal_planning)
-app.register_blueprint(chatbot)
+    return app
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    create_app().run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
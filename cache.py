@@ -0,0 +1,169 @@
+"""
+Caching for frequently read user data and generated insights
+
+User profiles and insights are shared across workers through Redis; achievement lists are
+kept in a short-lived per-process cache.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import redis
+from cachetools import TTLCache
+
+from app import db
+from models import User
+from services.gamification_service import get_unearned_achievements, get_user_achievements
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached profile is considered fresh
+PROFILE_TTL = 300
+# Extra seconds a stale profile may still be served while one request refreshes it
+PROFILE_STALE_TTL = 60
+# Seconds a refresh lock is held, so a crashed refresher cannot block others for long
+REFRESH_LOCK_TTL = 5
+# Seconds a generated insight is reused for the same health data entry
+INSIGHT_TTL = 7 * 24 * 60 * 60
+# Seconds achievement lists are kept in process memory
+ACHIEVEMENTS_TTL = 60
+
+PROFILE_FIELDS = (
+    "id", "username", "email", "full_name", "created_at", "is_active",
+    "current_streak", "longest_streak", "last_activity_date", "total_points", "level"
+)
+DATETIME_FIELDS = ("created_at", "last_activity_date")
+
+# Caching is disabled (every lookup goes to the database) when REDIS_URL is not set
+redis_url = os.environ.get("REDIS_URL")
+redis_client = redis.Redis.from_url(redis_url, socket_timeout=0.5) if redis_url else None
+
+# Per-process (earned, unearned) achievements by user id; the lock guards it across gthread threads
+achievements_cache = TTLCache(maxsize=1024, ttl=ACHIEVEMENTS_TTL)
+achievements_lock = threading.Lock()
+
+
+def _profile_key(user_id):
+    return f"user:{user_id}:profile"
+
+
+def _load_profile_data(user_id):
+    """Load the user's profile from the database as a JSON-serializable dict"""
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+
+    data = {field: getattr(user, field) for field in PROFILE_FIELDS}
+    for field in DATETIME_FIELDS:
+        if data[field] is not None:
+            data[field] = data[field].isoformat()
+    return data
+
+
+def _to_profile(data):
+    """Build the profile object handed to views and templates"""
+    if data is None:
+        return None
+
+    data = dict(data)
+    for field in DATETIME_FIELDS:
+        if data[field] is not None:
+            data[field] = datetime.fromisoformat(data[field])
+    return SimpleNamespace(**data)
+
+
+def _store_profile(key, data):
+    payload = json.dumps({"fresh_until": time.time() + PROFILE_TTL, "profile": data})
+    try:
+        redis_client.set(key, payload, ex=PROFILE_TTL + PROFILE_STALE_TTL)
+    except redis.RedisError:
+        logger.warning("Could not cache %s", key, exc_info=True)
+
+
+def get_user(user_id):
+    """Get the user's profile, served from Redis when possible"""
+    if redis_client is None:
+        return _to_profile(_load_profile_data(user_id))
+
+    key = _profile_key(user_id)
+    try:
+        cached = redis_client.get(key)
+        if cached is not None:
+            payload = json.loads(cached)
+            # Serve a stale profile while another request holds the lock and refreshes it
+            if payload["fresh_until"] > time.time() or not redis_client.set(
+                f"{key}:lock", 1, nx=True, ex=REFRESH_LOCK_TTL
+            ):
+                return _to_profile(payload["profile"])
+    except redis.RedisError:
+        logger.warning("Redis unavailable, loading user %s from the database", user_id, exc_info=True)
+        return _to_profile(_load_profile_data(user_id))
+
+    data = _load_profile_data(user_id)
+    if data is not None:
+        _store_profile(key, data)
+    return _to_profile(data)
+
+
+def invalidate_user(user_id):
+    """Drop the cached profile after the user's data changes"""
+    if redis_client is None:
+        return
+
+    try:
+        redis_client.delete(_profile_key(user_id))
+    except redis.RedisError:
+        logger.warning("Could not invalidate cached profile for user %s", user_id, exc_info=True)
+
+
+def _insight_key(user_id, health_data_id):
+    return f"insight:{user_id}:{health_data_id}"
+
+
+def get_cached_insight(user_id, health_data_id):
+    """Get the insight already generated for a health data entry, if any"""
+    if redis_client is None:
+        return None
+
+    try:
+        cached = redis_client.get(_insight_key(user_id, health_data_id))
+    except redis.RedisError:
+        logger.warning("Could not read cached insight for user %s", user_id, exc_info=True)
+        return None
+    return cached.decode() if cached is not None else None
+
+
+def cache_insight(user_id, health_data_id, insight_text):
+    """Remember the insight generated for a health data entry"""
+    if redis_client is None:
+        return
+
+    try:
+        redis_client.set(_insight_key(user_id, health_data_id), insight_text, ex=INSIGHT_TTL)
+    except redis.RedisError:
+        logger.warning("Could not cache insight for user %s", user_id, exc_info=True)
+
+
+def get_achievements(user_id):
+    """Get the user's (earned, unearned) achievements, cached in process memory"""
+    with achievements_lock:
+        achievements = achievements_cache.get(user_id)
+
+    if achievements is None:
+        achievements = (get_user_achievements(user_id), get_unearned_achievements(user_id))
+        with achievements_lock:
+            achievements_cache[user_id] = achievements
+    return achievements
+
+
+def invalidate_achievements(user_id):
+    """Drop this process's cached achievements after the user earns new ones
+
+    Other workers keep serving their copy until it expires after ACHIEVEMENTS_TTL seconds.
+    """
+    with achievements_lock:
+        achievements_cache.pop(user_id, None)
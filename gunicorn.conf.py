@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration for the Health Tracker application
+"""
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+reuse_port = True
+
+# Threaded workers: argon2 password hashing releases the GIL, so concurrent logins
+# are hashed in parallel instead of queueing behind each other in a single worker
+worker_class = "gthread"
+# Around 2 * CPU cores + 1 workers suits most hosts; set GUNICORN_WORKERS to match
+workers = int(os.environ.get("GUNICORN_WORKERS", 4))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# Build the app in the master so workers share its memory copy-on-write
+preload_app = True
@@ -0,0 +1,28 @@
+"""
+JSON provider serializing responses with orjson
+"""
+import orjson
+from flask.json.provider import DefaultJSONProvider
+from pydantic import BaseModel
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson
+
+    Datetimes are passed through to Flask's default handling, so jsonify output stays the
+    same; pydantic models are serialized with their JSON dump.
+    """
+
+    def default(self, o):
+        if isinstance(o, BaseModel):
+            return o.model_dump(mode="json")
+        return super().default(o)
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
@@ -7,4 +7,5 @@ from wsgi import app
 # It simply imports the app from wsgi.py
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    # Same as running wsgi.py directly: no debugger or reloader
+    app.run(host="0.0.0.0", port=5000, debug=False, threaded=True)
\ No newline at end of file
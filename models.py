@@ -1,41 +1,32 @@
 """
 Database models for the Health Tracker application
 """
-import json
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from sqlalchemy import JSON, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import relationship
-from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.security import check_password_hash
 
 from app import db
 
-# Define a custom JSON type for SQLite
-class JSONEncodedDict(db.TypeDecorator):
-    """Represents a JSON structure as Text for SQLite"""
-    impl = Text
-
-    def process_bind_param(self, value, dialect):
-        if value is not None:
-            value = json.dumps(value)
-        return value
-
-    def process_result_value(self, value, dialect):
-        if value is not None:
-            value = json.loads(value)
-        return value
+# Argon2id hasher for user passwords
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2)
 
 
 class User(db.Model):
     """User model for authentication and profile information"""
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
     hashed_password = Column(String(256), nullable=False)
     full_name = Column(String(100))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Timestamps keep a Python default next to the server default: SQLite can't add a DEFAULT to
+    # an existing column, so tables created before the server defaults would otherwise get NULLs
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp())
     is_active = Column(Boolean, default=True)
     
     # Gamification fields
@@ -53,11 +44,29 @@ class User(db.Model):
 
     def set_password(self, password):
         """Set password hash"""
-        self.hashed_password = generate_password_hash(password)
+        self.hashed_password = password_hasher.hash(password)
+
+        if self.id is not None:
+            from cache import invalidate_user
+            invalidate_user(self.id)
 
     def check_password(self, password):
-        """Check password against hash"""
-        return check_password_hash(self.hashed_password, password)
+        """Check password against hash, upgrading outdated hashes on success"""
+        if not self.hashed_password.startswith("$argon2"):
+            # Legacy werkzeug hash: rehash with argon2 now that the password is known
+            if not check_password_hash(self.hashed_password, password):
+                return False
+            self.set_password(password)
+            return True
+
+        try:
+            password_hasher.verify(self.hashed_password, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+        if password_hasher.check_needs_rehash(self.hashed_password):
+            self.set_password(password)
+        return True
 
     def __repr__(self):
         return f"<User {self.username}>"
@@ -66,10 +75,13 @@ class User(db.Model):
 class HealthData(db.Model):
     """Health data model for storing user health metrics"""
     __tablename__ = "health_data"
+    __table_args__ = (
+        Index("ix_healthdata_user_date", "user_id", "date"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    date = Column(DateTime, default=datetime.utcnow)
+    date = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp())
     weight = Column(Float)  # in kg
     height = Column(Float)  # in cm
     steps = Column(Integer)
@@ -94,8 +106,11 @@ class HealthData(db.Model):
 class NutritionEntry(db.Model):
     """Nutrition entry model for storing meal information"""
     __tablename__ = "nutrition_entries"
+    __table_args__ = (
+        Index("ix_nutritionentry_health_data_time", "health_data_id", "time"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     health_data_id = Column(Integer, ForeignKey("health_data.id"), nullable=False)
     meal_type = Column(String(50))  # breakfast, lunch, dinner, snack
     food_name = Column(String(100))
@@ -103,7 +118,7 @@ class NutritionEntry(db.Model):
     protein = Column(Float)  # in grams
     carbs = Column(Float)  # in grams
     fat = Column(Float)  # in grams
-    time = Column(DateTime, default=datetime.utcnow)
+    time = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp())
 
     # Relationships
     health_data = relationship("HealthData", back_populates="nutrition_entries")
@@ -115,13 +130,16 @@ class NutritionEntry(db.Model):
 class ActivityEntry(db.Model):
     """Activity entry model for storing exercise information"""
     __tablename__ = "activity_entries"
+    __table_args__ = (
+        Index("ix_activityentry_health_data_time", "health_data_id", "time"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     health_data_id = Column(Integer, ForeignKey("health_data.id"), nullable=False)
     activity_type = Column(String(50))
     duration = Column(Integer)  # in minutes
     calories_burned = Column(Integer)
-    time = Column(DateTime, default=datetime.utcnow)
+    time = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp())
 
     # Relationships
     health_data = relationship("HealthData", back_populates="activity_entries")
@@ -133,15 +151,18 @@ class ActivityEntry(db.Model):
 class Goal(db.Model):
     """Goal model for tracking user health objectives"""
     __tablename__ = "goals"
+    __table_args__ = (
+        Index("ix_goal_user_achieved", "user_id", "is_achieved"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     name = Column(String(100))
     description = Column(Text)
     target_value = Column(Float)
     current_value = Column(Float)
     goal_type = Column(String(50))  # weight, steps, activity, nutrition
-    start_date = Column(DateTime, default=datetime.utcnow)
+    start_date = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp())
     target_date = Column(DateTime)
     is_achieved = Column(Boolean, default=False)
 
@@ -155,12 +176,15 @@ class Goal(db.Model):
 class Insight(db.Model):
     """Insight model for storing AI-generated health insights"""
     __tablename__ = "insights"
+    __table_args__ = (
+        Index("ix_insight_user_created", "user_id", "created_at"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     insight_text = Column(Text)
     category = Column(String(50))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp())
     is_read = Column(Boolean, default=False)
 
     # Relationships
@@ -174,7 +198,7 @@ class Achievement(db.Model):
     """Achievement model for storing available badges and achievements"""
     __tablename__ = "achievements"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     description = Column(Text, nullable=False)
     badge_image = Column(String(200))  # Path or URL to the badge image
@@ -194,10 +218,10 @@ class UserAchievement(db.Model):
     """User achievement model for storing earned badges"""
     __tablename__ = "user_achievements"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     achievement_id = Column(Integer, ForeignKey("achievements.id"), nullable=False)
-    earned_at = Column(DateTime, default=datetime.utcnow)
+    earned_at = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp())
     displayed = Column(Boolean, default=False)  # Whether user has seen the achievement notification
     
     # Relationships
@@ -211,14 +235,17 @@ class UserAchievement(db.Model):
 class Notification(db.Model):
     """Notification model for storing user alerts and reminders"""
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notification_user_read_created", "user_id", "is_read", "created_at"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String(200), nullable=False)
     message = Column(Text, nullable=False)
     notification_type = Column(String(50), default="general")  # general, streak, health, meal, etc.
     link = Column(String(255))  # Optional URL to direct user when clicking the notification
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp())
     is_read = Column(Boolean, default=False)
     read_at = Column(DateTime)
     expires_at = Column(DateTime)  # When the notification should no longer be shown
@@ -234,17 +261,17 @@ class MealPlan(db.Model):
     """Meal plan model for storing generated meal plans"""
     __tablename__ = "meal_plans"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     name = Column(String(100))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    start_date = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp())
+    start_date = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp())
     end_date = Column(DateTime)
     daily_calories = Column(Integer)
     is_active = Column(Boolean, default=True)
     preferences = Column(Text)  # JSON string of preferred foods/cuisines
     restrictions = Column(Text)  # JSON string of dietary restrictions or allergies
-    plan_data = Column(JSONEncodedDict)  # Stores the full meal plan as JSON
+    plan_data = Column(JSON(none_as_null=True))  # Stores the full meal plan as JSON
     
     # Relationships
     user = relationship("User", backref="meal_plans")
@@ -257,13 +284,13 @@ class GroceryList(db.Model):
     """Grocery list model for storing shopping lists based on meal plans"""
     __tablename__ = "grocery_lists"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     meal_plan_id = Column(Integer, ForeignKey("meal_plans.id"), nullable=True)
     name = Column(String(100))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.current_timestamp())
     is_completed = Column(Boolean, default=False)
-    list_data = Column(JSONEncodedDict)  # Stores the categorized grocery items as JSON
+    list_data = Column(JSON(none_as_null=True))  # Stores the categorized grocery items as JSON
     
     # Relationships
     user = relationship("User", backref="grocery_lists")
@@ -1,37 +1,78 @@
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, TypeAdapter, create_model
+from typing import Annotated, Optional, List, Dict, Any
+import datetime as dt
+import msgspec
 from datetime import datetime, date
 
+class _Schema(BaseModel):
+    """Base for all schemas; each core schema is built on first use rather than at import"""
+    model_config = ConfigDict(defer_build=True)
+
+class _ResponseModel(_Schema):
+    """Base for response schemas: immutable, strict about unknown fields, and buildable from SQLAlchemy rows"""
+    model_config = ConfigDict(from_attributes=True, frozen=True, extra='forbid')
+
+    @classmethod
+    def from_orm_fast(cls, obj):
+        """Build the response from a trusted ORM row without validating it
+
+        Types are not checked or coerced, so only use this for rows read from our own
+        database; client payloads must still go through model_validate.
+        """
+        return cls.model_construct(**{field: getattr(obj, field) for field in cls.model_fields})
+
+def _derive(base, name, extra=None, all_optional=False, orm=False):
+    """Create a Create/Update/Response variant of a base schema
+
+    extra maps new field names to (type, default) tuples as for create_model. all_optional
+    makes every inherited field optional with a None default, and orm adds _ResponseModel
+    so the variant can be built from SQLAlchemy rows.
+    """
+    fields = {}
+    if all_optional:
+        for field, info in base.model_fields.items():
+            # Keep constraints such as max_length, which live in the field's metadata
+            annotation = Annotated[(info.annotation, *info.metadata)] if info.metadata else info.annotation
+            fields[field] = (Optional[annotation], None)
+    fields.update(extra or {})
+    return create_model(
+        name,
+        __base__=(base, _ResponseModel) if orm else base,
+        __module__=__name__,
+        **fields
+    )
+
+# Syntactic email check only; deliverability is not verified at signup
+Email = Annotated[str, StringConstraints(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$", max_length=254)]
+
+# Meal, activity and goal types are free text (the forms store any value), bounded by their String(50) columns
+MealType = Annotated[str, StringConstraints(max_length=50)]
+ActivityType = Annotated[str, StringConstraints(max_length=50)]
+GoalType = Annotated[str, StringConstraints(max_length=50)]
+
 # User schemas
-class UserBase(BaseModel):
+class UserBase(_Schema):
     username: str
-    email: EmailStr
+    email: Email
     full_name: Optional[str] = None
 
 class UserCreate(UserBase):
-    password: str
-    
-    @validator('password')
-    def password_strength(cls, v):
-        if len(v) < 8:
-            raise ValueError('Password must be at least 8 characters long')
-        return v
-
-class UserLogin(BaseModel):
+    password: str = Field(min_length=8)
+
+class UserLogin(_Schema):
     username: str
     password: str
 
-class UserResponse(UserBase):
+class UserResponse(UserBase, _ResponseModel):
     id: int
     is_active: bool
     created_at: datetime
-    
-    class Config:
-        orm_mode = True
 
 # Health Data schemas
-class HealthDataBase(BaseModel):
-    date: Optional[datetime.date] = None
+class HealthDataBase(_Schema):
+    model_config = ConfigDict(str_strip_whitespace=True, str_max_length=10_000)
+
+    date: Optional[dt.date] = None  # dt.date, as the field name shadows date in the class body
     weight: Optional[float] = None
     height: Optional[float] = None
     steps: Optional[int] = None
@@ -44,88 +85,100 @@ class HealthDataBase(BaseModel):
     blood_pressure_diastolic: Optional[int] = None
     notes: Optional[str] = None
 
-class HealthDataCreate(HealthDataBase):
-    pass
+HealthDataCreate = _derive(HealthDataBase, "HealthDataCreate")
 
-class HealthDataUpdate(HealthDataBase):
-    pass
+def _fast_struct(base, name):
+    """Build a msgspec Struct with the same fields as a pydantic schema
 
-class HealthDataResponse(HealthDataBase):
-    id: int
-    user_id: int
-    
-    class Config:
-        orm_mode = True
+    Strings keep the schema's str_max_length; msgspec has no str_strip_whitespace, so callers
+    strip them themselves. Other pydantic field constraints are not carried over.
+    """
+    max_length = base.model_config.get("str_max_length")
+    fields = []
+    for field, info in base.model_fields.items():
+        annotation = info.annotation
+        if max_length and annotation in (str, Optional[str]):
+            annotation = Annotated[str, msgspec.Meta(max_length=max_length)]
+            if info.annotation is not str:
+                annotation = Optional[annotation]
+        fields.append((field, annotation) if info.is_required() else (field, annotation, info.default))
+    return msgspec.defstruct(name, fields, omit_defaults=True, module=__name__)
+
+# HealthDataCreate for the JSON sync endpoint, decoded by msgspec straight from the request body
+HealthDataCreateFast = _fast_struct(HealthDataBase, "HealthDataCreateFast")
+
+HealthDataUpdate = _derive(HealthDataBase, "HealthDataUpdate", all_optional=True)
+HealthDataResponse = _derive(
+    HealthDataBase, "HealthDataResponse", {"id": (int, ...), "user_id": (int, ...)}, orm=True
+)
 
 # Nutrition Entry schemas
-class NutritionEntryBase(BaseModel):
-    meal_type: str
-    food_name: str
+class NutritionEntryBase(_Schema):
+    model_config = ConfigDict(str_strip_whitespace=True, str_max_length=10_000)
+
+    meal_type: MealType
+    food_name: str = Field(max_length=100)
     calories: int
     protein: Optional[float] = None
     carbs: Optional[float] = None
     fat: Optional[float] = None
     time: Optional[datetime] = None
 
-class NutritionEntryCreate(NutritionEntryBase):
-    health_data_id: int
+NutritionEntryCreate = _derive(NutritionEntryBase, "NutritionEntryCreate", {"health_data_id": (int, ...)})
+NutritionEntryResponse = _derive(
+    NutritionEntryBase, "NutritionEntryResponse", {"id": (int, ...), "health_data_id": (int, ...)}, orm=True
+)
 
-class NutritionEntryResponse(NutritionEntryBase):
-    id: int
-    health_data_id: int
-    
-    class Config:
-        orm_mode = True
+# Bulk entries without a health_data_id are added to today's health data
+NutritionEntryBulkItem = _derive(NutritionEntryBase, "NutritionEntryBulkItem", {"health_data_id": (Optional[int], None)})
 
 # Activity Entry schemas
-class ActivityEntryBase(BaseModel):
-    activity_type: str
+class ActivityEntryBase(_Schema):
+    model_config = ConfigDict(str_strip_whitespace=True, str_max_length=10_000)
+
+    activity_type: ActivityType
     duration: int
     calories_burned: Optional[int] = None
     time: Optional[datetime] = None
 
-class ActivityEntryCreate(ActivityEntryBase):
-    health_data_id: int
-
-class ActivityEntryResponse(ActivityEntryBase):
-    id: int
-    health_data_id: int
-    
-    class Config:
-        orm_mode = True
+ActivityEntryCreate = _derive(ActivityEntryBase, "ActivityEntryCreate", {"health_data_id": (int, ...)})
+ActivityEntryResponse = _derive(
+    ActivityEntryBase, "ActivityEntryResponse", {"id": (int, ...), "health_data_id": (int, ...)}, orm=True
+)
+ActivityEntryBulkItem = _derive(ActivityEntryBase, "ActivityEntryBulkItem", {"health_data_id": (Optional[int], None)})
 
 # Goal schemas
-class GoalBase(BaseModel):
-    name: str
-    description: Optional[str] = None
-    target_value: float
-    goal_type: str
-    target_date: Optional[date] = None
-
-class GoalCreate(GoalBase):
-    pass
+class GoalBase(_Schema):
+    model_config = ConfigDict(str_strip_whitespace=True, str_max_length=10_000)
 
-class GoalUpdate(BaseModel):
-    name: Optional[str] = None
+    name: str = Field(max_length=100)
     description: Optional[str] = None
-    target_value: Optional[float] = None
-    current_value: Optional[float] = None
-    goal_type: Optional[str] = None
+    target_value: float
+    goal_type: GoalType
     target_date: Optional[date] = None
-    is_achieved: Optional[bool] = None
 
-class GoalResponse(GoalBase):
-    id: int
-    user_id: int
-    current_value: Optional[float] = None
-    start_date: date
-    is_achieved: bool
-    
-    class Config:
-        orm_mode = True
+GoalCreate = _derive(GoalBase, "GoalCreate")
+GoalUpdate = _derive(
+    GoalBase,
+    "GoalUpdate",
+    {"current_value": (Optional[float], None), "is_achieved": (Optional[bool], None)},
+    all_optional=True
+)
+GoalResponse = _derive(
+    GoalBase,
+    "GoalResponse",
+    {
+        "id": (int, ...),
+        "user_id": (int, ...),
+        "current_value": (Optional[float], None),
+        "start_date": (date, ...),
+        "is_achieved": (bool, ...)
+    },
+    orm=True
+)
 
 # Health Insights schemas
-class HealthInsightRequest(BaseModel):
+class HealthInsightRequest(_Schema):
     weight: Optional[float] = None
     height: Optional[float] = None
     steps: Optional[int] = None
@@ -137,29 +190,55 @@ class HealthInsightRequest(BaseModel):
     blood_pressure_systolic: Optional[int] = None
     blood_pressure_diastolic: Optional[int] = None
 
-class HealthInsightResponse(BaseModel):
+    @classmethod
+    def validate_batch(cls, raw):
+        """Validate a list of insight requests in one call, e.g. for one batched LLM request"""
+        return _INSIGHT_REQUESTS_TA.validate_python(raw)
+
+class HealthInsightResponse(_ResponseModel):
     summary: str
     insights: List[Dict[str, str]]
     health_score: int
     priority_focus_areas: List[str]
 
+    @classmethod
+    def validate_insights(cls, raw):
+        return _INSIGHTS_TA.validate_python(raw)
+
 # Nutrition recommendation schemas
-class NutritionRecommendationRequest(BaseModel):
-    meals: List[Dict[str, Any]]
+class MealItem(_Schema):
+    meal_type: Optional[MealType] = None
+    food_name: str
+    calories: int
+    protein: Optional[float] = None
+    carbs: Optional[float] = None
+    fat: Optional[float] = None
+
+class NutritionRecommendationRequest(_Schema):
+    meals: List[MealItem]
     total_calories: Optional[int] = None
     total_protein: Optional[float] = None
     total_carbs: Optional[float] = None
     total_fat: Optional[float] = None
     weight_goal: Optional[str] = None
 
-class NutritionRecommendationResponse(BaseModel):
+    @classmethod
+    def validate_meals(cls, raw):
+        return _MEALS_TA.validate_python(raw)
+
+class NutritionRecommendationResponse(_ResponseModel):
     assessment: str
     recommendations: List[Dict[str, str]]
     meal_ideas: List[Dict[str, str]]
 
 # Activity recommendation schemas
-class ActivityRecommendationRequest(BaseModel):
-    activities: List[Dict[str, Any]]
+class ActivityItem(_Schema):
+    activity_type: ActivityType
+    duration: int
+    calories_burned: Optional[int] = None
+
+class ActivityRecommendationRequest(_Schema):
+    activities: List[ActivityItem]
     total_duration: Optional[int] = None
     total_calories_burned: Optional[int] = None
     steps: Optional[int] = None
@@ -169,7 +248,24 @@ class ActivityRecommendationRequest(BaseModel):
     fitness_level: Optional[str] = None
     goals: Optional[str] = None
 
-class ActivityRecommendationResponse(BaseModel):
+    @classmethod
+    def validate_activities(cls, raw):
+        return _ACTIVITIES_TA.validate_python(raw)
+
+class ActivityRecommendationResponse(_ResponseModel):
     assessment: str
     recommended_activities: List[Dict[str, str]]
     weekly_plan: List[Dict[str, Any]]
+
+# Validators for the list payloads, built once and reused when only the list needs validating
+_MEALS_TA = TypeAdapter(List[MealItem], config=ConfigDict(defer_build=True))
+_ACTIVITIES_TA = TypeAdapter(List[ActivityItem], config=ConfigDict(defer_build=True))
+_INSIGHTS_TA = TypeAdapter(List[Dict[str, str]], config=ConfigDict(defer_build=True))
+_INSIGHT_REQUESTS_TA = TypeAdapter(List[HealthInsightRequest], config=ConfigDict(defer_build=True))
+
+# Validators for the bulk endpoints, parsing the raw request body straight into entries
+nutrition_bulk_adapter = TypeAdapter(Annotated[List[NutritionEntryBulkItem], Field(min_length=1)])
+activity_bulk_adapter = TypeAdapter(Annotated[List[ActivityEntryBulkItem], Field(min_length=1)])
+
+# Schemas on the request path, built by create_app before workers fork
+HOT_SCHEMAS = (UserCreate, UserLogin, HealthDataCreate, HealthDataResponse)
@@ -0,0 +1,44 @@
+"""
+Background jobs for the Health Tracker application, run by an RQ worker:
+
+    python worker.py
+"""
+from datetime import datetime
+
+from rq import Queue
+
+from app import create_app, db
+from cache import cache_insight, redis_client
+from models import HealthData, Insight
+from services.groq_service import generate_health_insight
+
+# Initialized once when the worker imports this module, not in every forked job
+app = create_app()
+
+# Insights are generated inside the request when Redis is not configured
+insight_queue = Queue("insights", connection=redis_client) if redis_client is not None else None
+
+
+def create_insight(user_id, health_data_id):
+    """Generate an insight for a health data entry, save it and cache the text"""
+    health_data = db.session.get(HealthData, health_data_id)
+    insight_text = generate_health_insight(health_data)
+
+    new_insight = Insight(
+        user_id=user_id,
+        insight_text=insight_text,
+        category="health",
+        created_at=datetime.utcnow(),
+        is_read=False
+    )
+    db.session.add(new_insight)
+    db.session.commit()
+
+    cache_insight(user_id, health_data_id, insight_text)
+    return insight_text
+
+
+def generate_insight_job(user_id, health_data_id):
+    """RQ job wrapping create_insight in an application context"""
+    with app.app_context():
+        return create_insight(user_id, health_data_id)
@@ -0,0 +1,12 @@
+"""
+RQ worker entry point for background insight generation
+"""
+from rq import Worker
+
+# Importing tasks initializes the app here, in the parent, so forked jobs start from it
+from tasks import insight_queue
+
+if __name__ == "__main__":
+    if insight_queue is None:
+        raise SystemExit("Set REDIS_URL to run the insight worker")
+    Worker([insight_queue], connection=insight_queue.connection).work()
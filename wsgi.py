@@ -1,10 +1,13 @@
 """
 WSGI entry point for Gunicorn to serve the Flask application
 """
-from app import app
+from app import create_app
 
 # This file is the entry point that Gunicorn uses to run the Flask app
-# It simply imports the app from app.py
+# It builds the app once; with preload_app this happens in the master before forking
+app = create_app()
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    # Fallback without the debugger and reloader; in production run gunicorn, which reads
+    # gunicorn.conf.py (about 2 * CPU cores + 1 workers is a good starting point)
+    app.run(host="0.0.0.0", port=5000, debug=False, threaded=True)
\ No newline at end of file